@@ -1,206 +1,606 @@
-# === STEP 1: IMPORT LIBRARIES ===
-# We import necessary "toolboxes" (libraries) that Python needs.
-# 'requests' is used to send requests over the internet (to talk to APIs).
-# 'os' (Operating System) is used to read environment variables from the operating system.
-# 'datetime' is used to convert the timestamp into a human-readable format.
-import requests
-import os
-import datetime
-
-# === STEP 2: GLOBAL SETTINGS AND CONSTANTS ===
-# Here we define all fixed values and settings that the program uses.
-# Keeping them at the top makes them easy to find and change in the future.
-
-# --- Security Settings ---
-# The code reads your secret API keys from environment variables.
-# This is a secure method that ensures the keys are never written directly in the code.
-OPENSKY_CLIENT_ID = os.environ.get("OPENSKY_CLIENT_ID")
-OPENSKY_CLIENT_SECRET = os.environ.get("OPENSKY_CLIENT_SECRET")
-
-# --- API Endpoints ---
-# The fixed URLs for the different parts of the OpenSky API.
-TOKEN_URL = "https://auth.opensky-network.org/auth/realms/opensky-network/protocol/openid-connect/token"
-API_URL = "https://opensky-network.org/api/states/all"
-
-# --- Request Headers ---
-# A "User-Agent" tells the server which program is making the request.
-# It's good practice to include a custom, unique User-Agent.
-HEADERS = {'User-Agent': 'EyesUp/1.0 (Python)'}
-
-# --- Geographic Areas ---
-# A dictionary containing all our predefined search areas.
-# Each choice (e.g., "1") points to another object containing a name for display
-# and another dictionary with the exact coordinates for the search box (lamin, lomin, etc.).
-# This structure makes it easy to add, remove, or change locations.
-LOCATIONS = {
-    "1": {"name": "Greater Gothenburg", "coords": {"lamin": 57.55, "lomin": 11.70, "lamax": 57.85, "lomax": 12.35}},
-    "2": {"name": "Västra Götaland County", "coords": {"lamin": 57.2, "lomin": 10.8, "lamax": 59.8, "lomax": 14.5}},
-    "3": {"name": "Stockholm Area", "coords": {"lamin": 59.10, "lomin": 17.70, "lamax": 59.70, "lomax": 18.80}}
-}
-
-# === STEP 3: HELPER FUNCTIONS ===
-# Smaller, specialized functions that perform specific tasks.
-
-def degrees_to_cardinal(d):
-    """Helper function to convert degrees (0-360) to a cardinal compass direction (N, NE, E etc.)."""
-    dirs = ["N", "NNE", "NE", "ENE", "E", "ESE", "SE", "SSE", "S", "SSW", "SW", "WSW", "W", "WNW", "NW", "NNW"]
-    ix = round(d / (360. / len(dirs)))
-    return dirs[ix % len(dirs)]
-
-def get_opensky_token():
-    """
-    Authenticates against the OpenSky API with Client ID and Secret to get a
-    temporary Access Token. This token is then used to make the actual API calls.
-    This is part of the OAuth2 security standard.
-    """
-    # First, a critical check: are the API keys available as environment variables?
-    if not OPENSKY_CLIENT_ID or not OPENSKY_CLIENT_SECRET:
-        print("[ERROR] OpenSky environment variables are not set.")
-        print("        Run 'set OPENSKY_CLIENT_ID=...' and 'set OPENSKY_CLIENT_SECRET=...' in the terminal.")
-        return None # Aborts the function if keys are missing.
-    
-    # 'try...except' is Python's way of handling errors. The code inside 'try' is executed,
-    # and if an error occurs, the program jumps to the 'except' block instead of crashing.
-    try:
-        # This data structure (dictionary) specifies to OpenSky that we want to use
-        # the "client_credentials" flow and sends our credentials.
-        token_data = {"grant_type": "client_credentials", "client_id": OPENSKY_CLIENT_ID, "client_secret": OPENSKY_CLIENT_SECRET}
-        
-        # This is where the actual request to the OpenSky token URL is made.
-        # 'requests.post' is used to send data.
-        # 'timeout=10' means we will wait a maximum of 10 seconds for a response.
-        response = requests.post(TOKEN_URL, headers=HEADERS, data=token_data, timeout=10)
-        
-        # This line checks if the response from the server was an error (e.g., 401 Unauthorized).
-        # If it was an error, an exception is "raised" and the program jumps to the 'except' block.
-        response.raise_for_status()
-        
-        # If everything went well, we convert the text response (which is in JSON format)
-        # and extract our valuable "access_token".
-        access_token = response.json().get("access_token")
-        print("[SUCCESS] Access Token retrieved successfully.")
-        return access_token # Returns the retrieved token.
-
-    except Exception as e:
-        # If any error occurred during the 'try' block, it's caught here.
-        print(f"[ERROR] Failed to retrieve OpenSky Token: {e}")
-        return None # Returns None to indicate failure.
-
-def find_airplanes(opensky_token, location_info):
-    """
-    The main function for searching for airplanes. It receives a valid token
-    and information about which location to search.
-    """
-    # We unpack the information from the chosen location for easier access.
-    location_name = location_info["name"]
-    params = location_info["coords"]
-
-    print(f"\n[INFO] Searching for aircraft over {location_name}...")
-    print("-" * (len(location_name) + 35))
-
-    try:
-        # To make an authorized request, we need to send our token.
-        # The standard is to send it in an "Authorization" header with the text "Bearer " followed by the token.
-        api_headers = HEADERS.copy() # We copy our standard headers
-        api_headers['Authorization'] = f"Bearer {opensky_token}"
-        
-        # Now we make the actual request to get the aircraft data.
-        # 'requests.get' is used to retrieve data.
-        # 'params=params' adds our coordinates to the URL.
-        response = requests.get(API_URL, headers=api_headers, params=params, timeout=10)
-        response.raise_for_status() # Checks if the request failed.
-        
-        # We convert the JSON response and get the list of aircraft.
-        plane_list = response.json().get('states')
-
-        # If the list is empty or doesn't exist, we notify the user.
-        if not plane_list:
-            print("No aircraft found in your area at this time.")
-            return # Exits the function.
-
-        print(f"[INFO] Found {len(plane_list)} aircraft:\n")
-
-        # We loop through each aircraft in the list.
-        for plane_vector in plane_list:
-            # Each 'plane_vector' is a list of data. We extract the data we want
-            # based on its fixed position (index) in the list.
-            callsign = plane_vector[1].strip() if plane_vector[1] else "Unknown"
-            origin_country = plane_vector[2]
-            time_position_unix = plane_vector[3]
-            baro_altitude_m = plane_vector[7]
-            on_ground = plane_vector[8]
-            velocity_ms = plane_vector[9]
-            track_degrees = plane_vector[10]
-            vertical_rate_ms = plane_vector[11]
-            geo_altitude_m = plane_vector[13]
-
-            # We check if the data exists before using it to avoid errors.
-            # If data exists, we format it nicely. Otherwise, we show "Unknown".
-            
-            # Format status based on on_ground and vertical_rate
-            if on_ground:
-                status_text = "On the ground"
-            elif vertical_rate_ms is None:
-                status_text = "In the air (level)"
-            elif vertical_rate_ms > 0.3:
-                status_text = f"Climbing ({vertical_rate_ms:.1f} m/s)"
-            elif vertical_rate_ms < -0.3:
-                status_text = f"Descending ({abs(vertical_rate_ms):.1f} m/s)"
-            else:
-                status_text = "In the air (level)"
-            
-            # Format other data points
-            altitude_text = f"{int(baro_altitude_m)} m" if baro_altitude_m is not None else "Unknown"
-            geo_altitude_text = f"{int(geo_altitude_m)} m" if geo_altitude_m is not None else "Unknown"
-            velocity_text = f"{int(velocity_ms * 3.6)} km/h" if velocity_ms is not None else "Unknown"
-            track_text = f"{int(track_degrees)}° ({degrees_to_cardinal(track_degrees)})" if track_degrees is not None else "Unknown"
-            timestamp_text = datetime.datetime.fromtimestamp(time_position_unix).strftime('%Y-%m-%d %H:%M:%S') if time_position_unix else "Unknown"
-
-
-            # Finally, we print all the formatted information for the user.
-            print(f"Callsign: {callsign}")
-            print(f"   - Origin Country: {origin_country}")
-            print(f"   - Status:         {status_text}")
-            print(f"   - Baro Altitude:  {altitude_text}")
-            print(f"   - Geo Altitude:   {geo_altitude_text}")
-            print(f"   - Velocity:       {velocity_text}")
-            print(f"   - Track:          {track_text}")
-            print(f"   - Last Update:    {timestamp_text}\n")
-
-    except Exception as e:
-        print(f"[ERROR] An error occurred while calling the OpenSky API: {e}")
-
-# === STEP 4: MAIN PROGRAM ===
-# This is the main logic that runs when you start the script.
-def main():
-    """
-    The main function that controls the program flow: displays the menu,
-    receives user input, and calls the other functions in the correct order.
-    """
-    print("Select a search area:")
-    # Loops through our LOCATIONS dictionary and prints each selectable option.
-    for key, value in LOCATIONS.items():
-        print(f"  {key}: {value['name']}")
-    
-    # Asks the user to enter a number.
-    choice = input(f"Enter your choice (1-{len(LOCATIONS)}): ")
-
-    # Checks if the entered number exists as a key in our LOCATIONS dictionary.
-    if choice in LOCATIONS:
-        # If the choice is valid, get the information for the selected location.
-        selected_location = LOCATIONS[choice]
-        # Try to get a token from OpenSky.
-        token = get_opensky_token()
-        # If we received a token, proceed with searching for aircraft.
-        if token:
-            find_airplanes(token, selected_location)
-    else:
-        # If the choice was invalid, notify the user.
-        print(f"Invalid choice. Please restart the script and select a number between 1 and {len(LOCATIONS)}.")
-
-# === STEP 5: ENTRY POINT ===
-# This special 'if' statement is standard in Python. It ensures that the 'main()' function
-# is only executed when you run the file directly (e.g., with 'python EyesUp.py'),
-# and not if this file were to be imported as a library into another script.
-if __name__ == "__main__":
-    main()
+# === STEP 1: IMPORT LIBRARIES ===
+# We import necessary "toolboxes" (libraries) that Python needs.
+# 'httpx' is used to send requests over the internet (to talk to APIs) without
+# blocking the program while we wait for the answer. It speaks HTTP/2, which
+# lets all our parallel searches share one single secure connection.
+# 'asyncio' is Python's built-in framework for running such non-blocking tasks,
+# which lets us query several areas at the same time instead of one after another.
+# 'argparse' is used to read command-line options, so the program can also be
+# run from scripts and scheduled jobs without typing into a menu.
+# 'sys' is used to write all search results to the screen in one operation,
+# and to check whether the program is talking to a human or to a script.
+# 'ssl' is used to prepare the secure-connection (TLS) settings one single
+# time instead of once per connection.
+# 'os' (Operating System) is used to read environment variables from the operating system.
+# 'json' is the built-in JSON module; we use it for hashing cache keys and as
+# the fallback whenever the faster optional 'orjson' is not installed.
+# 'time' is used to compare the current time against the token's expiry time,
+# and to convert position timestamps into human-readable text.
+# 'hashlib' is used to turn a set of search coordinates into a short, unique
+# filename for the response cache.
+# 'numpy' is used to convert whole columns of aircraft data (speeds, altitudes,
+# headings) in single operations instead of one aircraft at a time.
+import httpx
+import asyncio
+import argparse
+import ssl
+import sys
+import os
+import json
+import time
+import hashlib
+import urllib.parse
+import numpy as np
+
+# 'orjson' is an optional, much faster JSON parser. If it is installed we use
+# it to decode the (often large) aircraft responses; if not, the program still
+# works fine with the built-in 'json' module.
+try:
+    import orjson
+    _json_loads = orjson.loads
+    _json_dumps_bytes = orjson.dumps
+except ImportError:
+    _json_loads = json.loads
+    def _json_dumps_bytes(obj):
+        return json.dumps(obj).encode()
+
+# === STEP 2: GLOBAL SETTINGS AND CONSTANTS ===
+# Here we define all fixed values and settings that the program uses.
+# Keeping them at the top makes them easy to find and change in the future.
+
+# --- Security Settings ---
+# The code reads your secret API keys from environment variables.
+# This is a secure method that ensures the keys are never written directly in the code.
+OPENSKY_CLIENT_ID = os.environ.get("OPENSKY_CLIENT_ID")
+OPENSKY_CLIENT_SECRET = os.environ.get("OPENSKY_CLIENT_SECRET")
+
+# --- API Endpoints ---
+# The fixed URLs for the different parts of the OpenSky API.
+TOKEN_URL = "https://auth.opensky-network.org/auth/realms/opensky-network/protocol/openid-connect/token"
+API_URL = "https://opensky-network.org/api/states/all"
+
+# --- Token Cache ---
+# OpenSky tokens stay valid for about 30 minutes, so instead of asking for a
+# new one on every run we save the latest token (and when it expires) in a
+# small file in your home directory and reuse it while it is still fresh.
+TOKEN_CACHE = os.path.expanduser("~/.eyesup_token.json")
+
+# --- Response Cache ---
+# Aircraft positions only change meaningfully every few seconds, and OpenSky
+# rate-limits how often we may call the API. Responses are therefore saved per
+# search area for a few seconds, so running the script twice in a row reuses
+# the previous answer instead of making a second identical request.
+STATE_CACHE_DIR = os.path.expanduser("~/.eyesup_cache")
+STATE_CACHE_TTL = 8 # How many seconds a cached response stays valid.
+
+# --- In-Memory State (watch mode) ---
+# In watch mode a background task keeps this dictionary filled with the newest
+# aircraft list per area name, so displaying an area is a plain dictionary
+# lookup instead of a network call.
+LATEST_STATES = {}
+
+# --- Request Headers ---
+# A "User-Agent" tells the server which program is making the request.
+# It's good practice to include a custom, unique User-Agent.
+# "Accept-Encoding" asks the server to compress its answer before sending it.
+# The aircraft data compresses very well (often 5-10x smaller), so this saves
+# most of the download time for large search areas. httpx decompresses the
+# answer for us automatically.
+HEADERS = {'User-Agent': 'EyesUp/1.0 (Python)', 'Accept-Encoding': 'gzip, deflate'}
+
+# Brotli ("br") compresses even better than gzip, but decoding it needs the
+# optional 'brotli' package. We only advertise it to the server if that
+# package is actually installed, otherwise we could not read the reply.
+try:
+    import brotli # noqa: F401 - only imported to check that it is available.
+    HEADERS['Accept-Encoding'] += ', br'
+except ImportError:
+    pass
+
+# --- TLS Settings ---
+# Setting up a secure connection needs an SSL "context": the list of trusted
+# certificate authorities, allowed protocol versions, and so on. Loading the
+# certificate bundle from disk takes tens of milliseconds, so we build the
+# context once here and hand the same one to every connection we open.
+SSL_CONTEXT = ssl.create_default_context()
+
+# --- Geographic Areas ---
+# A dictionary containing all our predefined search areas.
+# Each choice (e.g., "1") points to another object containing a name for display
+# and another dictionary with the exact coordinates for the search box (lamin, lomin, etc.).
+# This structure makes it easy to add, remove, or change locations.
+LOCATIONS = {
+    "1": {"name": "Greater Gothenburg", "coords": {"lamin": 57.55, "lomin": 11.70, "lamax": 57.85, "lomax": 12.35}},
+    "2": {"name": "Västra Götaland County", "coords": {"lamin": 57.2, "lomin": 10.8, "lamax": 59.8, "lomax": 14.5}},
+    "3": {"name": "Stockholm Area", "coords": {"lamin": 59.10, "lomin": 17.70, "lamax": 59.70, "lomax": 18.80}}
+}
+
+# The coordinates never change while the program runs, so the query-string
+# part of each search URL (e.g. "lamin=57.55&lomin=11.7&...") is encoded once
+# here instead of being re-encoded on every request.
+for _location in LOCATIONS.values():
+    _location["query"] = urllib.parse.urlencode(_location["coords"])
+
+# --- Output Template ---
+# The layout for one aircraft's details, written once here instead of being
+# rebuilt from many small f-strings per plane. Keeping it in one place also
+# means there is exactly one spot to edit if the layout should change.
+PLANE_TEMPLATE = ("Callsign: {callsign}\n"
+                  "   - Origin Country: {country}\n"
+                  "   - Status:         {status}\n"
+                  "   - Baro Altitude:  {baro}\n"
+                  "   - Geo Altitude:   {geo}\n"
+                  "   - Velocity:       {vel}\n"
+                  "   - Track:          {track}\n"
+                  "   - Last Update:    {ts}\n\n")
+
+# --- Compass Directions ---
+# The 16 compass directions and the number of degrees each one covers.
+# These are built once when the program starts, so converting a heading to a
+# direction (which happens once per aircraft) costs no extra work per call.
+_CARDINALS = ("N", "NNE", "NE", "ENE", "E", "ESE", "SE", "SSE", "S", "SSW", "SW", "WSW", "W", "WNW", "NW", "NNW")
+_CARDINAL_STEP = 360.0 / len(_CARDINALS)
+
+# Headings are shown as whole degrees, so only 360 distinct values ever reach
+# the display. We therefore work out the answer for every possible degree once
+# at start-up; converting a heading later is then a plain table lookup with no
+# arithmetic at all. The NumPy copy lets us look up a whole response at once.
+_TRACK_TO_DIR = tuple(_CARDINALS[int(degree / _CARDINAL_STEP + 0.5) & 0xF] for degree in range(360))
+_TRACK_TO_DIR_ARRAY = np.array(_TRACK_TO_DIR)
+
+# === STEP 3: HELPER FUNCTIONS ===
+# Smaller, specialized functions that perform specific tasks.
+
+def degrees_to_cardinal(d):
+    """Helper function to convert degrees (0-360) to a cardinal compass direction (N, NE, E etc.)."""
+    # All 360 possible answers were precomputed at start-up, so this is just
+    # an indexing operation into the ready-made table.
+    return _TRACK_TO_DIR[int(d) % 360]
+
+def _float_column(arr, index):
+    """
+    Extracts one column from the aircraft array as 64-bit floats, replacing
+    missing values (None) with NaN ("Not a Number") so NumPy can run arithmetic
+    over the entire column in one go without tripping over the gaps.
+    """
+    column = arr[:, index]
+    return np.where(column == None, np.nan, column).astype(np.float64) # noqa: E711 - elementwise None check
+
+# The three helpers below format one optional value each. A missing value is
+# NaN, and NaN is the only value in Python that is not equal to itself, so the
+# cheap 'value == value' comparison is all it takes to detect it - one check
+# per field instead of a chain of conditional expressions in the main loop.
+
+def _metres_text(value):
+    """Formats an altitude in whole metres, or "Unknown" if it is missing."""
+    return f"{int(value)} m" if value == value else "Unknown"
+
+def _kmh_text(value):
+    """Formats a speed in whole km/h, or "Unknown" if it is missing."""
+    return f"{int(value)} km/h" if value == value else "Unknown"
+
+def _track_text(value, cardinal):
+    """Formats a heading in degrees with its compass direction, or "Unknown"."""
+    return f"{int(value)}° ({cardinal})" if value == value else "Unknown"
+
+def _state_cache_path(params):
+    """Helper function that maps a set of search coordinates to its cache file.
+    The coordinates are hashed so the filename stays short and filesystem-safe."""
+    digest = hashlib.blake2b(json.dumps(params, sort_keys=True).encode()).hexdigest()
+    return os.path.join(STATE_CACHE_DIR, f"{digest}.json")
+
+def load_cached_states(params):
+    """
+    Returns the aircraft list saved for these coordinates if it is younger than
+    STATE_CACHE_TTL seconds, or None if there is no fresh cache entry.
+    """
+    try:
+        # The cache file holds the same large payload we downloaded, so it is
+        # decoded with the same fast JSON parser as the network response.
+        with open(_state_cache_path(params), "rb") as cache_file:
+            entry = _json_loads(cache_file.read())
+        if time.time() - entry["t"] < STATE_CACHE_TTL:
+            return entry["states"]
+    except Exception:
+        # No cache file, or an unreadable one, simply means "not cached".
+        pass
+    return None
+
+def save_cached_states(params, plane_list):
+    """Saves a freshly fetched aircraft list to the cache for these coordinates."""
+    try:
+        os.makedirs(STATE_CACHE_DIR, exist_ok=True)
+        cache_path = _state_cache_path(params)
+        # Write to a temporary file first and then rename it into place.
+        # 'os.replace' is atomic, so a parallel search never sees a half-written file.
+        # The payload is encoded with the same fast JSON serializer used for
+        # pipe output, which matters here since it can be hundreds of KB.
+        temp_path = cache_path + ".tmp"
+        with open(temp_path, "wb") as cache_file:
+            cache_file.write(_json_dumps_bytes({"t": time.time(), "states": plane_list}))
+        os.replace(temp_path, cache_path)
+    except Exception:
+        # Failing to write the cache is harmless - the next run just fetches again.
+        pass
+
+async def get_opensky_token(client):
+    """
+    Authenticates against the OpenSky API with Client ID and Secret to get a
+    temporary Access Token. This token is then used to make the actual API calls.
+    This is part of the OAuth2 security standard.
+    """
+    # First, a critical check: are the API keys available as environment variables?
+    if not OPENSKY_CLIENT_ID or not OPENSKY_CLIENT_SECRET:
+        print("[ERROR] OpenSky environment variables are not set.")
+        print("        Run 'set OPENSKY_CLIENT_ID=...' and 'set OPENSKY_CLIENT_SECRET=...' in the terminal.")
+        return None # Aborts the function if keys are missing.
+
+    # Before going to the network, check if we still have a usable token saved
+    # from an earlier run. The 30-second safety margin makes sure we never hand
+    # out a token that is just about to expire mid-request.
+    try:
+        with open(TOKEN_CACHE, "rb") as cache_file:
+            cached = _json_loads(cache_file.read())
+        if cached["client_id"] == OPENSKY_CLIENT_ID and cached["expires_at"] - time.time() > 30:
+            return cached["access_token"] # The saved token is still fresh - reuse it.
+    except Exception:
+        # A missing or unreadable cache file is not an error - it simply means
+        # we have to request a brand new token below.
+        pass
+
+    # 'try...except' is Python's way of handling errors. The code inside 'try' is executed,
+    # and if an error occurs, the program jumps to the 'except' block instead of crashing.
+    try:
+        # This data structure (dictionary) specifies to OpenSky that we want to use
+        # the "client_credentials" flow and sends our credentials.
+        token_data = {"grant_type": "client_credentials", "client_id": OPENSKY_CLIENT_ID, "client_secret": OPENSKY_CLIENT_SECRET}
+
+        # This is where the actual request to the OpenSky token URL is made.
+        # 'client.post' sends data, and the 'await' keyword hands control back
+        # to the event loop while we wait for the server's answer.
+        response = await client.post(TOKEN_URL, data=token_data)
+
+        # This line checks if the response from the server was an error (e.g., 401 Unauthorized).
+        # If it was an error, an exception is "raised" and the program jumps to the 'except' block.
+        response.raise_for_status()
+
+        # If everything went well, we convert the text response (which is in JSON format)
+        # and extract our valuable "access_token". The reply also tells us,
+        # in "expires_in", how many seconds the token will remain valid.
+        token_reply = response.json()
+        access_token = token_reply.get("access_token")
+        expires_in = token_reply.get("expires_in", 0)
+        print("[SUCCESS] Access Token retrieved successfully.")
+
+        # Save the new token to the cache file so the next run can skip the
+        # whole network round-trip. The file permissions are restricted to the
+        # current user (0o600) because the token is a secret.
+        try:
+            with open(TOKEN_CACHE, "wb") as cache_file:
+                cache_file.write(_json_dumps_bytes({"client_id": OPENSKY_CLIENT_ID, "access_token": access_token, "expires_at": time.time() + expires_in}))
+            os.chmod(TOKEN_CACHE, 0o600)
+        except Exception:
+            # If the cache cannot be written (e.g., read-only disk) we simply
+            # carry on - caching is an optimization, not a requirement.
+            pass
+        return access_token # Returns the retrieved token.
+
+    except Exception as e:
+        # If any error occurred during the 'try' block, it's caught here.
+        print(f"[ERROR] Failed to retrieve OpenSky Token: {e}")
+        return None # Returns None to indicate failure.
+
+async def fetch_states(client, location_info):
+    """
+    Fetches the current aircraft list for one location, going through the
+    on-disk response cache first. Returns the raw list of aircraft rows
+    (possibly None when OpenSky has no data for the area).
+    """
+    params = location_info["coords"]
+
+    # First, see if we already fetched this exact area within the last few
+    # seconds. If so, we can skip the network request entirely.
+    plane_list = load_cached_states(params)
+
+    if plane_list is None:
+        # Now we make the actual request to get the aircraft data. The
+        # "Authorization" header with our token was set once on the shared
+        # client in main(), so there is nothing to copy or rebuild here.
+        # 'client.get' retrieves data, and 'await' lets other searches run
+        # while this one is waiting for the network. The coordinates were
+        # already encoded into the URL's query string at start-up.
+        response = await client.get(f"{API_URL}?{location_info['query']}")
+        response.raise_for_status() # Checks if the request failed.
+
+        # We take the raw response bytes and decode them ourselves with
+        # the fastest JSON parser available, then get the list of aircraft.
+        plane_list = _json_loads(response.content).get('states')
+
+        # Remember this answer so an immediate re-run can reuse it.
+        save_cached_states(params, plane_list)
+
+    return plane_list
+
+def display_planes(location_info, plane_list):
+    """
+    Formats and writes one location's aircraft list. This is pure in-memory
+    work - all the network activity already happened in fetch_states.
+    """
+    location_name = location_info["name"]
+
+    # Every print would normally be its own small write to the terminal - for
+    # hundreds of aircraft that is thousands of system calls. Instead we
+    # collect all the output lines in this list and write them to the screen
+    # in one single operation at the end of the function. As a bonus, parallel
+    # area searches no longer mix their lines together.
+    lines = [f"\n[INFO] Searching for aircraft over {location_name}...\n",
+             "-" * (len(location_name) + 35) + "\n"]
+
+    try:
+        # When the output goes to another program (a pipe, e.g.
+        # 'python EyesUp.py --all | grep SAS') instead of a human at a
+        # terminal, the decorative layout below is wasted work and is awkward
+        # to parse on the other end. In that case we emit one compact JSON
+        # line per aircraft and skip the pretty path entirely.
+        if not sys.stdout.isatty():
+            lines.clear() # Pipes get pure data - drop the decorative header.
+            if plane_list:
+                sys.stdout.buffer.write(b"".join(_json_dumps_bytes(row) + b"\n" for row in plane_list))
+            return
+
+        # If the list is empty or doesn't exist, we notify the user.
+        if not plane_list:
+            lines.append("No aircraft found in your area at this time.\n")
+            return # Exits the function (the collected lines are still written below).
+
+        lines.append(f"[INFO] Found {len(plane_list)} aircraft:\n\n")
+
+        # Each aircraft row from OpenSky has 17 fields, but we only display 9
+        # of them. We copy just those fields (by their fixed positions in the
+        # row) into a compact NumPy array, so the big original rows can be
+        # freed early and every later step touches less memory.
+        arr = np.array([(row[1], row[2], row[3], row[7], row[8], row[9], row[10], row[11], row[13]) for row in plane_list], dtype=object)
+        del plane_list # The full response is no longer needed - let it be freed.
+
+        # Now we process entire columns of the compact array at once.
+        time_positions = _float_column(arr, 2)   # Unix timestamp of last position.
+        baro_altitudes = _float_column(arr, 3)   # Barometric altitude in metres.
+        velocities_kmh = _float_column(arr, 5) * 3.6 # m/s converted to km/h, all rows at once.
+        tracks = _float_column(arr, 6)           # Heading in degrees.
+        vertical_rates = _float_column(arr, 7)   # Climb/descent rate in m/s.
+        geo_altitudes = _float_column(arr, 8)    # Geometric altitude in metres.
+
+        # Compass directions for every aircraft in one indexing operation into
+        # the precomputed per-degree table - no division or rounding at all.
+        # Missing headings are temporarily treated as 0 here; the formatting
+        # loop below never reads those entries because the heading is NaN.
+        track_ints = np.where(np.isnan(tracks), 0.0, tracks).astype(np.int64) % 360
+        cardinals = _TRACK_TO_DIR_ARRAY[track_ints]
+
+        # Classify every aircraft's flight status in one vectorized pass.
+        # 'np.select' checks the conditions in order for all rows at once and
+        # assigns a small code: 0 = on the ground, 1 = level flight,
+        # 2 = climbing, 3 = descending. An unknown climb rate (NaN) counts as
+        # level, and so does anything between -0.3 and +0.3 m/s (the default).
+        on_ground_mask = arr[:, 4].astype(bool)
+        status_codes = np.select(
+            [on_ground_mask, np.isnan(vertical_rates), vertical_rates > 0.3, vertical_rates < -0.3],
+            [0, 1, 2, 3],
+            default=1)
+
+        # Timestamps repeat a lot within one response - many aircraft report
+        # their position during the same second. We remember each second we
+        # have already formatted, so the (comparatively slow) text conversion
+        # runs once per distinct second instead of once per aircraft.
+        timestamp_cache = {}
+
+        # We loop through each aircraft. All the arithmetic already happened
+        # above, so this loop only turns the results into text. Columns 0, 1
+        # and 4 of the compact array are callsign, country and on-ground flag.
+        for i in range(len(arr)):
+            callsign = arr[i, 0].strip() if arr[i, 0] else "Unknown"
+            origin_country = arr[i, 1]
+
+            # We check if the data exists (NaN means missing) before using it.
+            # If data exists, we format it nicely. Otherwise, we show "Unknown".
+
+            # Turn the precomputed status code into text. Only climbing and
+            # descending aircraft need any extra work here (the actual rate).
+            status_code = status_codes[i]
+            if status_code == 0:
+                status_text = "On the ground"
+            elif status_code == 2:
+                status_text = f"Climbing ({vertical_rates[i]:.1f} m/s)"
+            elif status_code == 3:
+                status_text = f"Descending ({abs(vertical_rates[i]):.1f} m/s)"
+            else:
+                status_text = "In the air (level)"
+
+            # Format other data points via the small typed helpers above.
+            altitude_text = _metres_text(baro_altitudes[i])
+            geo_altitude_text = _metres_text(geo_altitudes[i])
+            velocity_text = _kmh_text(velocities_kmh[i])
+            track_text = _track_text(tracks[i], cardinals[i])
+            # Note: a missing timestamp is NaN here, and any comparison against
+            # NaN is False, so 'time_positions[i] > 0' filters those out too.
+            # 'time.strftime' + 'time.localtime' formats the timestamp without
+            # building a datetime object first, and the cache skips even that
+            # for seconds we have already seen.
+            if time_positions[i] > 0:
+                ts_second = int(time_positions[i])
+                timestamp_text = timestamp_cache.get(ts_second)
+                if timestamp_text is None:
+                    timestamp_text = timestamp_cache[ts_second] = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(ts_second))
+            else:
+                timestamp_text = "Unknown"
+
+
+            # Finally, we pour all the formatted values into the shared output
+            # template - one format call per aircraft instead of many.
+            lines.append(PLANE_TEMPLATE.format_map({
+                "callsign": callsign, "country": origin_country,
+                "status": status_text, "baro": altitude_text,
+                "geo": geo_altitude_text, "vel": velocity_text,
+                "track": track_text, "ts": timestamp_text}))
+
+    except Exception as e:
+        lines.append(f"[ERROR] An error occurred while formatting the results: {e}\n")
+    finally:
+        # One single write delivers everything we collected, whether the
+        # search succeeded, found nothing, or failed with an error.
+        sys.stdout.write("".join(lines))
+
+async def find_airplanes(client, location_info):
+    """
+    One-shot search: fetches the aircraft over one location and displays them.
+    """
+    try:
+        plane_list = await fetch_states(client, location_info)
+    except Exception as e:
+        sys.stdout.write(f"\n[ERROR] An error occurred while calling the OpenSky API: {e}\n")
+        return
+    display_planes(location_info, plane_list)
+
+async def refresh_states(client, locations, interval):
+    """
+    Background task for watch mode. It quietly keeps LATEST_STATES filled with
+    the newest aircraft list for every watched area, refreshing each one every
+    'interval' seconds. Anyone reading LATEST_STATES gets the data instantly -
+    the waiting for the network all happens here, off to the side.
+    """
+    while True:
+        for location in locations:
+            try:
+                LATEST_STATES[location["name"]] = await fetch_states(client, location)
+            except Exception as e:
+                # A failed refresh is not fatal in watch mode; we keep showing
+                # the previous snapshot and try again on the next round.
+                sys.stderr.write(f"[WARN] Refresh of {location['name']} failed: {e}\n")
+        await asyncio.sleep(interval)
+
+async def watch_airplanes(client, locations, interval):
+    """
+    Monitoring mode: starts the background refresher and then re-displays the
+    newest snapshot of every watched area on each tick. Displaying reads only
+    from memory (LATEST_STATES), so it never has to wait for the network.
+    Runs until interrupted with Ctrl+C.
+    """
+    refresher = asyncio.create_task(refresh_states(client, locations, interval))
+    try:
+        while True:
+            # Give the refresher time to complete a round, then show what we have.
+            await asyncio.sleep(interval)
+            for location in locations:
+                if location["name"] in LATEST_STATES:
+                    display_planes(location, LATEST_STATES[location["name"]])
+    finally:
+        # Stop the background task cleanly when the watch loop ends.
+        refresher.cancel()
+
+# === STEP 4: MAIN PROGRAM ===
+# This is the main logic that runs when you start the script.
+def parse_arguments():
+    """
+    Reads the command-line options. Passing '--area 1,3' or '--all' skips the
+    interactive menu entirely, which makes the program usable from shell
+    scripts, pipelines, and scheduled jobs (cron) where nobody can type.
+    """
+    parser = argparse.ArgumentParser(description="Fetch and display live aircraft data from the OpenSky Network.")
+    parser.add_argument("--area", help="comma-separated area numbers to scan, e.g. '1' or '1,3'")
+    parser.add_argument("--all", action="store_true", help="scan every predefined area at once")
+    parser.add_argument("--watch", type=float, metavar="SECONDS",
+                        help="keep running and refresh the selected areas every SECONDS seconds")
+    return parser.parse_args()
+
+def choose_locations(args):
+    """
+    Works out which areas to scan. Command-line options win; if none were
+    given and a human is at the keyboard, we fall back to the familiar menu.
+    Returns a list of location entries (possibly empty if nothing valid was chosen).
+    """
+    # '--all' beats everything else: scan every area we know about.
+    if args.all:
+        return list(LOCATIONS.values())
+
+    # '--area 1,3' picks specific areas by their menu numbers.
+    if args.area:
+        keys = [key.strip() for key in args.area.split(",")]
+        invalid = [key for key in keys if key not in LOCATIONS]
+        if invalid:
+            print(f"Invalid area number(s): {', '.join(invalid)}. Valid choices are 1-{len(LOCATIONS)}.")
+            return []
+        return [LOCATIONS[key] for key in keys]
+
+    # No options were given. Only show the interactive menu if a real person
+    # is at the terminal - in a pipeline or cron job there is nobody to answer.
+    if not sys.stdin.isatty():
+        print("No area selected. Use --area or --all when running non-interactively.")
+        return []
+
+    print("Select a search area:")
+    # Loops through our LOCATIONS dictionary and prints each selectable option.
+    for key, value in LOCATIONS.items():
+        print(f"  {key}: {value['name']}")
+    print("  0: All areas at once")
+
+    # Asks the user to enter a number.
+    choice = input(f"Enter your choice (0-{len(LOCATIONS)}): ")
+    if choice == "0":
+        return list(LOCATIONS.values())
+    if choice in LOCATIONS:
+        return [LOCATIONS[choice]]
+
+    # If the choice was invalid, notify the user.
+    print(f"Invalid choice. Please restart the script and select a number between 0 and {len(LOCATIONS)}.")
+    return []
+
+async def main():
+    """
+    The main function that controls the program flow: works out which areas to
+    scan, opens the shared network client, and calls the other functions in
+    the correct order.
+    """
+    args = parse_arguments()
+    if args.watch is not None and args.watch <= 0:
+        print("The --watch interval must be a positive number of seconds.")
+        return
+
+    locations = choose_locations(args)
+    if not locations:
+        return # Nothing (valid) was selected - the user has already been told why.
+
+    # One shared client is opened for the whole program run. With HTTP/2
+    # enabled, all parallel area searches travel as separate "streams" over a
+    # single secure connection, so the expensive TLS handshake happens once
+    # and the repeated request headers are compressed (HPACK) on the wire.
+    limits = httpx.Limits(max_connections=4)
+    async with httpx.AsyncClient(http2=True, headers=HEADERS, timeout=10.0, verify=SSL_CONTEXT, limits=limits) as client:
+        # Try to get a token from OpenSky.
+        token = await get_opensky_token(client)
+        # If we received a token, proceed with searching for aircraft.
+        # 'asyncio.gather' starts all the searches at the same time and waits
+        # until every one of them is finished. The total time is roughly the
+        # slowest single request instead of the sum of all.
+        if token:
+            # To make authorized requests, we attach the token to the shared
+            # client once. The standard is an "Authorization" header with the
+            # text "Bearer " followed by the token; every request made through
+            # the client from here on carries it automatically.
+            client.headers['Authorization'] = f"Bearer {token}"
+            if args.watch:
+                # Watch mode: keep refreshing and re-displaying until Ctrl+C.
+                await watch_airplanes(client, locations, args.watch)
+            else:
+                await asyncio.gather(*(find_airplanes(client, location) for location in locations))
+
+# === STEP 5: ENTRY POINT ===
+# This special 'if' statement is standard in Python. It ensures that the 'main()' function
+# is only executed when you run the file directly (e.g., with 'python EyesUp.py'),
+# and not if this file were to be imported as a library into another script.
+# 'asyncio.run' starts the event loop that drives all our 'async' functions.
+# Pressing Ctrl+C (most useful in watch mode) simply ends the program.
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("\nStopped.")